@@ -4,43 +4,161 @@ Batch Print Hot Folder - A solution for automatically printing files from hot fo
 import os
 import sys
 import time
-import json
+import errno
 import logging
-import shutil
+import functools
+import itertools
+import queue
+import signal
 import subprocess
 import platform
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from operator import attrgetter
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional, Set, Tuple, Union
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler, FileSystemEvent
 
+try:
+    import fcntl  # POSIX
+except ImportError:
+    fcntl = None
 
-def get_default_printer() -> Optional[str]:
-    """Get the system's default printer name"""
+try:
+    import msvcrt  # Windows
+except ImportError:
+    msvcrt = None
+
+try:
+    # Optional: faster JSON parsing
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    # Optional: typed config decoding that skips fields the service doesn't use
+    import msgspec
+except ImportError:
+    msgspec = None
+
+# Seconds a parsed config file is reused before it is read again
+CONFIG_CACHE_TTL = 60.0
+
+# Seconds the system default printer is remembered before it is looked up again
+DEFAULT_PRINTER_TTL = 30.0
+
+# Config files larger than this (in bytes) are memory-mapped for parsing
+CONFIG_MMAP_THRESHOLD = 256 * 1024
+
+# Maximum number of files waiting to be printed in one hot folder
+MAX_PENDING_FILES = 100_000
+
+# Maximum number of filenames to remember duplicate counters for
+DEDUPE_CACHE_SIZE = 10_000
+
+# Files already in printer language, sent to the spooler as-is on Windows
+RAW_PRINT_EXTENSIONS = {".prn", ".pcl", ".raw"}
+
+# Operating system name, looked up once rather than for every file
+_SYSTEM = platform.system()
+
+if msgspec is not None:
+    class _HotFolderSchema(msgspec.Struct, kw_only=True):
+        """Fields of a hot_folders entry read by the service"""
+        name: str
+        watch_path: str
+        printer_name: Optional[str] = None
+        success_folder: str
+        error_folder: str
+    
+    class _ConfigSchema(msgspec.Struct, kw_only=True):
+        """Top-level config fields read by the service"""
+        hot_folders: List[_HotFolderSchema] = []
+        poll_interval: Union[int, float] = 5
+        log_level: str = "INFO"
+    
+    _config_decoder = msgspec.json.Decoder(_ConfigSchema)
+
+# Parsed config files by absolute path: (mtime_ns, size, loaded_at, config)
+_config_cache: Dict[str, Tuple[int, int, float, dict]] = {}
+
+# File system event API required on each platform
+_NATIVE_EVENT_APIS = {
+    "Linux": "inotify",
+    "Darwin": "FSEvents",
+    "Windows": "ReadDirectoryChangesW",
+}
+
+# File systems where inotify misses changes made by other machines, so hot
+# folders on them are polled instead (Linux)
+_NETWORK_FILESYSTEMS = {
+    "nfs", "nfs4", "cifs", "smb3", "smbfs", "fuse.sshfs", "9p", "afs", "ceph", "glusterfs",
+}
+
+# Command used to send files to a named printer on CUPS-based systems
+_PRINT_COMMANDS = {
+    "Darwin": ["lpr", "-P"],  # macOS
+    "Linux": ["lp", "-d"],
+}
+
+# One lock per printer name, so hot folders sharing a printer send their
+# jobs one at a time
+_printer_locks: Dict[str, threading.Lock] = {}
+_printer_locks_guard = threading.Lock()
+
+
+def _printer_lock(printer_name: str) -> threading.Lock:
+    """Get the lock that serializes print jobs for a printer"""
+    with _printer_locks_guard:
+        lock = _printer_locks.get(printer_name)
+        if lock is None:
+            lock = _printer_locks[printer_name] = threading.Lock()
+        return lock
+
+
+def _read_cups_default() -> Optional[str]:
+    """Get the default printer from the environment or lpoptions files
+    
+    These are checked by CUPS before the server's default, and reading
+    them avoids starting lpstat. Returns None if none of them set one.
+    """
+    for variable in ("LPDEST", "PRINTER"):
+        printer = os.environ.get(variable)
+        # PRINTER=lp is a traditional placeholder, not a real printer
+        if printer and not (variable == "PRINTER" and printer == "lp"):
+            return printer
+    
+    for path in (os.path.expanduser("~/.cups/lpoptions"), "/etc/cups/lpoptions"):
+        try:
+            with open(path) as f:
+                for line in f:
+                    # "Default name[/instance] option=value ..."
+                    fields = line.split()
+                    if len(fields) > 1 and fields[0].lower() == "default":
+                        return fields[1]
+        except OSError:
+            continue
+    return None
+
+
+@functools.lru_cache(maxsize=1)
+def _lookup_default_printer() -> Optional[str]:
+    """Ask the system for its default printer name"""
     try:
-        system = platform.system()
-        
-        if system == "Windows":
+        if _SYSTEM == "Windows":
             # Windows: Get default printer using win32print
             import win32print
             return win32print.GetDefaultPrinter()
             
-        elif system == "Darwin":  # macOS
-            # Use lpstat -d to get default printer
-            result = subprocess.run(
-                ["lpstat", "-d"],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            # Output format: "system default destination: PrinterName"
-            output = result.stdout.strip()
-            if ":" in output:
-                return output.split(":")[-1].strip()
-            return None
+        elif _SYSTEM in _PRINT_COMMANDS:  # macOS and Linux (CUPS)
+            printer = _read_cups_default()
+            if printer:
+                return printer
             
-        elif system == "Linux":
-            # Use lpstat -d to get default printer
+            # Otherwise use lpstat -d to get the server's default printer
             result = subprocess.run(
                 ["lpstat", "-d"],
                 capture_output=True,
@@ -61,243 +179,784 @@ def get_default_printer() -> Optional[str]:
         return None
 
 
+# When _lookup_default_printer's cached result was last refreshed (monotonic)
+_default_printer_checked_at = 0.0
+
+
+def get_default_printer() -> Optional[str]:
+    """Get the system's default printer name
+    
+    The result is cached for DEFAULT_PRINTER_TTL seconds; call
+    get_default_printer.cache_clear() (done on SIGHUP) to pick up a
+    changed default printer right away.
+    """
+    global _default_printer_checked_at
+    now = time.monotonic()
+    if now - _default_printer_checked_at > DEFAULT_PRINTER_TTL:
+        _lookup_default_printer.cache_clear()
+        _default_printer_checked_at = now
+    return _lookup_default_printer()
+
+
+get_default_printer.cache_clear = _lookup_default_printer.cache_clear
+
+
+def _is_network_path(path: str) -> bool:
+    """Check whether path is on a network share (Windows and Linux only)"""
+    path = os.path.realpath(path)
+    
+    if _SYSTEM == "Windows":
+        if path.startswith("\\\\"):
+            return True
+        try:
+            import win32file
+            drive = os.path.splitdrive(path)[0] + "\\"
+            return win32file.GetDriveType(drive) == win32file.DRIVE_REMOTE
+        except Exception:
+            return False
+    
+    if _SYSTEM == "Linux":
+        # The longest mount point containing path decides its file system
+        fs_type = None
+        longest = -1
+        try:
+            with open("/proc/self/mounts") as f:
+                for line in f:
+                    fields = line.split()
+                    if len(fields) < 3:
+                        continue
+                    mount_point = fields[1].replace("\\040", " ")
+                    if ((path == mount_point or path.startswith(mount_point.rstrip("/") + "/"))
+                            and len(mount_point) > longest):
+                        fs_type = fields[2]
+                        longest = len(mount_point)
+        except OSError:
+            return False
+        return fs_type in _NETWORK_FILESYSTEMS
+    
+    return False
+
+
+def _create_observer(polling: bool = False):
+    """Create the native file system observer, returning (observer, close_events)
+    
+    watchdog's generic Observer quietly falls back to polling every folder
+    when the native API can't be loaded, so the platform's observer is
+    imported directly and a missing one is reported as an error. Polling
+    is only used when asked for, for folders on network shares where
+    native events miss files written by other machines.
+    """
+    if polling:
+        from watchdog.observers.polling import PollingObserver
+        return PollingObserver(), False
+    
+    try:
+        if _SYSTEM == "Linux":
+            # Use inotify directly so IN_CLOSE_WRITE is reported; full events
+            # make files moved in from elsewhere arrive as moves, not creations
+            from watchdog.observers.inotify import InotifyObserver
+            return InotifyObserver(generate_full_events=True), True
+        
+        if _SYSTEM == "Darwin":
+            from watchdog.observers.fsevents import FSEventsObserver
+            return FSEventsObserver(), False
+        
+        if _SYSTEM == "Windows":
+            from watchdog.observers.read_directory_changes import WindowsApiObserver
+            return WindowsApiObserver(), False
+    except ImportError as e:
+        raise RuntimeError(
+            f"Native file system events ({_NATIVE_EVENT_APIS[_SYSTEM]}) are not "
+            f"available, refusing to fall back to polling: {e}"
+        ) from e
+    
+    return Observer(), False
+
+
+def _is_unlocked(path: str) -> bool:
+    """Check without waiting that no other process is holding path locked
+    
+    File shares (SMB/AFP) and some copy tools lock a file while writing it.
+    If the file system doesn't support locks, the file counts as unlocked.
+    """
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        # Windows refuses to open a file another process has open for writing
+        return False
+    try:
+        if fcntl is not None:
+            # A shared lock only conflicts with a writer's exclusive lock
+            fcntl.flock(fd, fcntl.LOCK_SH | fcntl.LOCK_NB)
+        elif msvcrt is not None:
+            msvcrt.locking(fd, msvcrt.LK_NBRLCK, 1)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    except BlockingIOError:
+        return False
+    except OSError as e:
+        if e.errno in (errno.EACCES, errno.EAGAIN, errno.EDEADLK):
+            return False
+    finally:
+        os.close(fd)
+    return True
+
+
+@dataclass(frozen=True)
 class HotFolderConfig:
     """Configuration for a single hot folder"""
-    def __init__(self, name: str, watch_path: str, printer_name: Optional[str], 
-                 success_folder: str, error_folder: str):
-        self.name = name
-        self.watch_path = watch_path
-        self.printer_name = printer_name if printer_name else None
-        self.success_folder = success_folder
-        self.error_folder = error_folder
-        
-        # Create success and error folders if they don't exist
+    __slots__ = ("name", "watch_path", "printer_name", "success_folder",
+                 "error_folder", "excluded_roots", "success_prefix", "error_prefix")
+    
+    name: str
+    watch_path: str
+    printer_name: Optional[str]
+    success_folder: str
+    error_folder: str
+    
+    def __post_init__(self):
+        # Fields are frozen, so derived values are set through object
+        if not self.printer_name:
+            object.__setattr__(self, "printer_name", None)
+        # Resolved Success/Error folders; files inside them are never printed.
+        # Derived from the fields above, so not a dataclass field itself
+        object.__setattr__(self, "excluded_roots", frozenset(
+            {Path(self.success_folder).resolve(), Path(self.error_folder).resolve()}
+        ))
+        # Success/Error folders with a trailing separator, so destination
+        # paths are built by concatenating the filename
+        object.__setattr__(self, "success_prefix", os.path.join(self.success_folder, ""))
+        object.__setattr__(self, "error_prefix", os.path.join(self.error_folder, ""))
+    
+    def create_folders(self):
+        """Create the Success and Error folders if they don't exist"""
         os.makedirs(self.success_folder, exist_ok=True)
         os.makedirs(self.error_folder, exist_ok=True)
 
 
+@dataclass(frozen=True)
+class PendingFile:
+    """A file waiting to be printed, with its name parsed once"""
+    path: str
+    name: str
+    stem: str
+    ext: str
+    # Found by scanning the folder rather than reported by an event; not
+    # part of the file's identity
+    from_scan: bool = field(default=False, compare=False)
+    
+    @classmethod
+    def from_path(cls, path: str, from_scan: bool = False) -> "PendingFile":
+        name = os.path.basename(path)
+        stem, ext = os.path.splitext(name)
+        return cls(path, name, stem, ext, from_scan)
+
+
 class PrintHandler(FileSystemEventHandler):
     """Handler for file system events in hot folders"""
     
-    def __init__(self, config: HotFolderConfig):
+    def __init__(self, config: HotFolderConfig, close_events: bool = False,
+                 wakeup: Optional[threading.Event] = None):
         self.config = config
         self.logger = logging.getLogger(f"PrintHandler-{config.name}")
-        self.pending_files = set()
+        # Files detected by the observer thread, drained by process_pending_files
+        self.pending_files: "queue.SimpleQueue[PendingFile]" = queue.SimpleQueue()
+        # Drained files not yet processed (e.g. not ready), oldest first, with
+        # the (size, mtime_ns) seen on the last pass (None until checked);
+        # also drops duplicate events for the same file
+        self._seen: "OrderedDict[PendingFile, Optional[Tuple[int, int]]]" = OrderedDict()
+        # Pending files found by a scan and not since reported by a close
+        # event, so they are checked for readiness even with close events
+        self._scanned: Set[PendingFile] = set()
+        # Set when pending files were dropped at MAX_PENDING_FILES; the folder
+        # is rescanned for them once there is room again
+        self._rescan_after_overflow = False
+        # Printed files that couldn't be moved out of the hot folder; they
+        # aren't queued again (and printed again) until they leave it
+        self._unmovable: Set[PendingFile] = set()
+        # Open printer handles reused between jobs, keyed by printer name (Windows)
+        self._printer_handles: Dict[str, object] = {}
+        # Next duplicate counter to try, keyed by (folder, filename), least
+        # recently used first
+        self._dedupe_counters: "OrderedDict[Tuple[str, str], int]" = OrderedDict()
+        # Whether a Success/Error folder is on the hot folder's filesystem,
+        # keyed by folder path
+        self._same_device: Dict[str, bool] = {}
+        # True when the observer reports IN_CLOSE_WRITE (Linux inotify): files
+        # are then only queued once the writer has closed them
+        self.close_events = close_events
+        # Set whenever a file is queued so the service processes it right away
+        self.wakeup = wakeup
+        # Print function for this OS, chosen once
+        self._print_impl = self._select_print_impl()
         
     def on_created(self, event: FileSystemEvent):
         """Handle file creation events"""
         if event.is_directory:
             return
+        
+        # With close events available the file may still be open for writing;
+        # wait for on_closed instead
+        if self.close_events:
+            return
             
-        file_path = event.src_path
+        self._queue_file(event.src_path)
+    
+    def on_closed(self, event: FileSystemEvent):
+        """Handle file closed-after-write events (Linux only)"""
+        if event.is_directory:
+            return
+            
+        self._queue_file(event.src_path)
+    
+    def on_moved(self, event: FileSystemEvent):
+        """Handle files moved into the hot folder (already complete)"""
+        if event.is_directory or not event.dest_path:
+            return
+            
+        # A file moved away may be replaced by a new one with the same name
+        self._unmovable.discard(PendingFile.from_path(event.src_path))
+        self._queue_file(event.dest_path)
+    
+    def on_deleted(self, event: FileSystemEvent):
+        """Handle files removed from the hot folder"""
+        if event.is_directory:
+            return
         
+        self._unmovable.discard(PendingFile.from_path(event.src_path))
+    
+    def initial_scan(self):
+        """Queue files already in the hot folder (e.g. copied while stopped)"""
+        names = set()
+        try:
+            with os.scandir(self.config.watch_path) as entries:
+                for entry in entries:
+                    # Empty files are most likely still being written
+                    if entry.is_file() and entry.stat().st_size > 0:
+                        names.add(entry.name)
+                        self._queue_file(entry.path, from_scan=True)
+        except OSError as e:
+            self.logger.error("❌ Error scanning hot folder: %s", e)
+            return
+        
+        # Forget unmovable files that have since left the hot folder, in case
+        # the delete event was missed
+        for pending_file in list(self._unmovable):
+            if pending_file.name not in names:
+                self._unmovable.discard(pending_file)
+    
+    def _queue_file(self, file_path: str, from_scan: bool = False):
+        """Add a file to the pending set"""
         # Ignore files in Success or Error folders
-        if (self.config.success_folder in file_path or 
-            self.config.error_folder in file_path):
+        parents = Path(file_path).resolve().parents
+        if any(parent in self.config.excluded_roots for parent in parents):
+            return
+            
+        pending_file = PendingFile.from_path(file_path, from_scan)
+        if pending_file in self._unmovable:
             return
             
-        filename = os.path.basename(file_path)
-        self.logger.info(f"📄 NEW FILE DETECTED: {filename}")
-        self.pending_files.add(file_path)
+        self.pending_files.put(pending_file)
+        if self.wakeup is not None:
+            self.wakeup.set()
         
     def process_pending_files(self):
         """Process all pending files in alphabetical order"""
-        if not self.pending_files:
+        if self._rescan_after_overflow and len(self._seen) < MAX_PENDING_FILES:
+            self._rescan_after_overflow = False
+            self.initial_scan()
+        
+        while True:
+            try:
+                pending_file = self.pending_files.get_nowait()
+            except queue.Empty:
+                break
+            
+            # Queued again (e.g. by a rescan) before its move failed
+            if pending_file in self._unmovable:
+                continue
+            if pending_file not in self._seen:
+                # Logged here rather than when queued, so rescans don't
+                # report files already pending
+                self.logger.info("📄 NEW FILE DETECTED: %s", pending_file.name)
+                self._seen[pending_file] = None
+                if pending_file.from_scan:
+                    self._scanned.add(pending_file)
+            elif not pending_file.from_scan:
+                # A close event confirms a file first found by a scan
+                self._scanned.discard(pending_file)
+            if len(self._seen) > MAX_PENDING_FILES:
+                # Keep memory bounded if files arrive faster than they print;
+                # dropped files stay in the hot folder and are found again by
+                # a rescan once the backlog has shrunk
+                dropped, _ = self._seen.popitem(last=False)
+                self._rescan_after_overflow = True
+                self._scanned.discard(dropped)
+                self.logger.warning("⚠️  Too many pending files, skipping for now: %s", dropped.name)
+        
+        if not self._seen:
             return
             
-        # Get list of files that still exist
-        existing_files = [f for f in self.pending_files if os.path.exists(f)]
+        # Get list of files that still exist, reading the hot folder once
+        # rather than checking every pending file separately
+        with os.scandir(self.config.watch_path) as entries:
+            existing_entries = {entry.name: entry for entry in entries if entry.is_file()}
+        
+        # Forget files deleted or moved away before they could be printed
+        for pending_file in [f for f in self._seen if f.name not in existing_entries]:
+            del self._seen[pending_file]
+            self._scanned.discard(pending_file)
+        existing_files = list(self._seen)
         
         # Sort alphabetically by filename
-        sorted_files = sorted(existing_files, key=lambda x: os.path.basename(x))
+        sorted_files = sorted(existing_files, key=attrgetter('name'))
         
         if sorted_files:
-            self.logger.info(f"Processing {len(sorted_files)} file(s) in alphabetical order...")
+            self.logger.info("Processing %s file(s) in alphabetical order...", len(sorted_files))
         
-        for file_path in sorted_files:
-            filename = os.path.basename(file_path)
-            
-            # Wait a bit to ensure file is completely written
-            time.sleep(1)
-            
-            # Check if file still exists and is not being written to
-            if not self._is_file_ready(file_path):
-                self.logger.warning(f"⏳ File not ready yet, will retry: {filename}")
+        ready_files = []
+        for pending_file in sorted_files:
+            # Files reported by a close event are complete unless empty (the
+            # writer may reopen them to fill them in); otherwise (including
+            # files found by a scan) wait until they stop changing
+            entry = existing_entries[pending_file.name]
+            if self.close_events and pending_file not in self._scanned:
+                if not self._has_content(entry):
+                    continue
+            elif not self._is_file_stable(pending_file, entry):
                 continue
-                
-            success = self.print_file(file_path)
             
-            if success:
-                self.move_to_success(file_path)
+            ready_files.append(pending_file)
+        
+        results = self.print_files(ready_files)
+        
+        # Wait a bit for print jobs to be queued before moving the files,
+        # once for the whole batch rather than after every file
+        if any(results.values()):
+            time.sleep(2)
+        
+        for pending_file in ready_files:
+            if results[pending_file]:
+                moved = self.move_to_success(pending_file)
             else:
-                self.move_to_error(file_path)
+                moved = self.move_to_error(pending_file)
+            if not moved:
+                # Still in the hot folder: don't print it again on every rescan
+                self._unmovable.add(pending_file)
+                self.logger.warning("⚠️  Leaving file in hot folder, not printing it again: %s",
+                                    pending_file.name)
                 
-            self.pending_files.discard(file_path)
+            del self._seen[pending_file]
+            self._scanned.discard(pending_file)
     
-    def _is_file_ready(self, file_path: str, max_attempts: int = 3) -> bool:
-        """Check if file is ready to be processed (not being written)"""
-        for attempt in range(max_attempts):
-            try:
-                # Try to get file size
-                size1 = os.path.getsize(file_path)
-                time.sleep(0.5)
-                size2 = os.path.getsize(file_path)
-                
-                # If size hasn't changed, file is likely ready
-                if size1 == size2 and size1 > 0:
-                    return True
-            except (OSError, FileNotFoundError):
-                return False
+    def _is_file_stable(self, pending_file: PendingFile, entry: os.DirEntry) -> bool:
+        """Check that a file is ready and unchanged since the previous pass
         
-        return False
+        Without close events nothing says when the writer is done, so the
+        file's size and modification time (from this pass's scan entry) must
+        match those seen on the previous pass; the first pass only records them.
+        """
+        try:
+            stat = entry.stat()
+        except OSError:
+            return False
+        previous = self._seen[pending_file]
+        current = (stat.st_size, stat.st_mtime_ns)
+        self._seen[pending_file] = current
+        if previous is None:
+            return False
+        
+        if previous != current or not self._is_file_ready(pending_file.path, entry):
+            self.logger.warning("⏳ File not ready yet, will retry: %s", pending_file.name)
+            return False
+        return True
     
-    def print_file(self, file_path: str) -> bool:
-        """Print a file using the OS default application"""
-        filename = os.path.basename(file_path)
-        file_size = os.path.getsize(file_path)
-        size_kb = file_size / 1024
+    @staticmethod
+    def _has_content(entry: os.DirEntry) -> bool:
+        """Check that a file is not empty, using its scan entry"""
+        try:
+            return entry.stat().st_size > 0
+        except OSError:
+            return False
+    
+    def _is_file_ready(self, file_path: str, entry: Optional[os.DirEntry] = None) -> bool:
+        """Check if file is ready to be processed (not empty and not locked
+        by the process writing it)
         
-        # Determine which printer to use
+        If the file's directory entry from a scan is given, its size is used
+        instead of looking the file up again.
+        """
+        try:
+            if entry is not None:
+                size = entry.stat().st_size
+            else:
+                size = os.path.getsize(file_path)
+        except OSError:
+            return False
+        return size > 0 and _is_unlocked(file_path)
+    
+    def _resolve_printer(self) -> Optional[str]:
+        """Determine which printer to use for this hot folder"""
         printer_to_use = self.config.printer_name
         if not printer_to_use:
             # Get default printer if none specified
             printer_to_use = get_default_printer()
             if not printer_to_use:
-                self.logger.error(f"❌ No printer specified and no default printer available")
-                return False
-            self.logger.info(f"Using default printer: {printer_to_use}")
+                # Don't keep the failed lookup so the next file tries again
+                get_default_printer.cache_clear()
+                self.logger.error("❌ No printer specified and no default printer available")
+                return None
+            self.logger.info("Using default printer: %s", printer_to_use)
         
-        self.logger.info(f"🖨️  PRINTING: {filename} ({size_kb:.1f} KB)")
+        return printer_to_use
+    
+    def _submit_print_batch(self, files: List[PendingFile], printer_name: str) -> bool:
+        """Send several files with a single lp/lpr call (macOS and Linux only)
+        
+        Returns False if the batch could not be sent, in which case the
+        caller should fall back to printing the files one at a time.
+        """
+        if _SYSTEM not in _PRINT_COMMANDS:
+            return False
+        
+        cmd = _PRINT_COMMANDS[_SYSTEM] + [printer_name] + [f.path for f in files]
+        
+        self.logger.info("🖨️  PRINTING BATCH: %s file(s)", len(files))
         
         try:
-            system = platform.system()
+            with _printer_lock(printer_name):
+                subprocess.run(cmd, check=True)
+        except Exception as e:
+            self.logger.warning("⚠️  Batch print failed, printing files one at a time: %s", e)
+            return False
+        
+        self.logger.info("✅ Print job sent successfully: %s file(s)", len(files))
+        return True
+    
+    def print_files(self, files: List[PendingFile]) -> Dict[PendingFile, bool]:
+        """Print several files, returning whether each one was sent
+        
+        The printer is resolved once so the whole batch goes to the same
+        printer. The files are first sent as one batch; if that fails each
+        file is printed on its own so only the failing ones are reported.
+        """
+        printer_to_use = self._resolve_printer()
+        if not printer_to_use:
+            return {pending_file: False for pending_file in files}
+        
+        # lp/lpr accept many files, so try to send the whole batch at once
+        if len(files) > 1 and self._submit_print_batch(files, printer_to_use):
+            return {pending_file: True for pending_file in files}
+        
+        return {pending_file: self.print_file(pending_file, printer_to_use)
+                for pending_file in files}
+    
+    def print_file(self, pending_file: PendingFile, printer_name: Optional[str] = None) -> bool:
+        """Print a file using the OS default application"""
+        filename = pending_file.name
+        
+        printer_to_use = printer_name or self._resolve_printer()
+        if not printer_to_use:
+            return False
+        
+        # Only stat the file for its size when the message will be logged
+        if self.logger.isEnabledFor(logging.INFO):
+            size_kb = os.path.getsize(pending_file.path) / 1024
+            self.logger.info("🖨️  PRINTING: %s (%.1f KB)", filename, size_kb)
+        
+        try:
+            if self._print_impl is None:
+                self.logger.error("❌ Unsupported operating system: %s", _SYSTEM)
+                return False
             
-            if system == "Windows":
-                # Windows printing
-                import win32print
-                import win32api
-                
-                # Set the printer
-                win32print.SetDefaultPrinter(printer_to_use)
-                
-                # Print using ShellExecute with 'print' verb
+            with _printer_lock(printer_to_use):
+                self._print_impl(pending_file, printer_to_use)
+            
+            self.logger.info("✅ Print job sent successfully: %s", filename)
+            return True
+            
+        except Exception as e:
+            self.logger.error("❌ PRINT FAILED: %s - %s", filename, e)
+            return False
+    
+    def _select_print_impl(self) -> Optional[Callable[[PendingFile, str], None]]:
+        """Pick the print function for this OS once, so printing a file
+        doesn't have to branch on the platform or import modules again"""
+        if _SYSTEM == "Windows":
+            return self._make_windows_print_impl()
+        
+        if _SYSTEM in _PRINT_COMMANDS:
+            cmd_prefix = _PRINT_COMMANDS[_SYSTEM]
+            
+            def print_cups(pending_file: PendingFile, printer_name: str):
+                subprocess.run(cmd_prefix + [printer_name, pending_file.path], check=True)
+            
+            return print_cups
+        
+        return None
+    
+    def _make_windows_print_impl(self) -> Callable[[PendingFile, str], None]:
+        """Build the Windows print function"""
+        import pywintypes
+        import win32api
+        import win32print
+        
+        def get_printer_handle(printer_name: str):
+            # Open a printer once and reuse the handle for later jobs
+            handle = self._printer_handles.get(printer_name)
+            if handle is None:
+                handle = win32print.OpenPrinter(printer_name)
+                self._printer_handles[printer_name] = handle
+            return handle
+        
+        def print_raw(pending_file: PendingFile, printer_name: str):
+            # Send the file straight to the spooler without rendering it
+            with open(pending_file.path, "rb") as f:
+                data = f.read()
+            
+            handle = get_printer_handle(printer_name)
+            try:
+                win32print.StartDocPrinter(handle, 1, (pending_file.name, None, "RAW"))
+                try:
+                    win32print.StartPagePrinter(handle)
+                    win32print.WritePrinter(handle, data)
+                    win32print.EndPagePrinter(handle)
+                finally:
+                    win32print.EndDocPrinter(handle)
+            except Exception:
+                # The handle may have gone stale (e.g. printer removed); reopen next time
+                del self._printer_handles[printer_name]
+                win32print.ClosePrinter(handle)
+                raise
+        
+        def print_windows(pending_file: PendingFile, printer_name: str):
+            if pending_file.ext.lower() in RAW_PRINT_EXTENSIONS:
+                print_raw(pending_file, printer_name)
+                return
+            
+            try:
+                # The 'printto' verb takes the printer name, so the system
+                # default printer is left alone
+                win32api.ShellExecute(
+                    0,
+                    "printto",
+                    pending_file.path,
+                    f'"{printer_name}"',
+                    ".",
+                    0
+                )
+            except pywintypes.error:
+                # The application has no 'printto' verb: set the printer as
+                # default and use the 'print' verb instead
+                win32print.SetDefaultPrinter(printer_name)
                 win32api.ShellExecute(
                     0,
                     "print",
-                    file_path,
-                    f'/d:"{printer_to_use}"',
+                    pending_file.path,
+                    f'/d:"{printer_name}"',
                     ".",
                     0
                 )
+        
+        return print_windows
+    
+    def close(self):
+        """Release printer handles held by this handler"""
+        if not self._printer_handles:
+            return
+        
+        import win32print
+        for handle in self._printer_handles.values():
+            win32print.ClosePrinter(handle)
+        self._printer_handles.clear()
+    
+    def _move_unique(self, pending_file: PendingFile, folder: str, prefix: str) -> str:
+        """Move a file into folder (prefix is folder plus a separator) without
+        overwriting, returning its new name"""
+        same_device = self._is_same_device(folder)
+        if self._move_no_replace(pending_file.path, prefix + pending_file.name, same_device):
+            return pending_file.name
+        
+        # Handle duplicate filenames, starting from the last counter used
+        # for this name so earlier duplicates aren't tried again
+        key = (folder, pending_file.name)
+        counter = self._dedupe_counters.get(key)
+        if counter is None:
+            counter = self._next_free_counter(folder, pending_file.stem, pending_file.ext)
+        
+        for counter in itertools.count(counter):
+            dest_name = f"{pending_file.stem}_{counter}{pending_file.ext}"
+            if self._move_no_replace(pending_file.path, prefix + dest_name, same_device):
+                break
+        
+        self._dedupe_counters[key] = counter + 1
+        self._dedupe_counters.move_to_end(key)
+        if len(self._dedupe_counters) > DEDUPE_CACHE_SIZE:
+            # Forget the name not duplicated for the longest time; it is
+            # found again with one folder scan if it comes back
+            self._dedupe_counters.popitem(last=False)
+        return dest_name
+    
+    def _is_same_device(self, folder: str) -> bool:
+        """Check once whether folder is on the same filesystem as the hot folder"""
+        same_device = self._same_device.get(folder)
+        if same_device is None:
+            try:
+                same_device = os.stat(folder).st_dev == os.stat(self.config.watch_path).st_dev
+            except OSError:
+                # Don't remember the answer; the folder may appear later
+                return True
+            self._same_device[folder] = same_device
+        return same_device
+    
+    @staticmethod
+    def _move_no_replace(src: str, dest: str, same_device: bool = True) -> bool:
+        """Move src to dest, returning False if dest already exists
+        
+        The destination name is claimed atomically, so two handlers moving
+        files with the same name can't overwrite each other.
+        """
+        if same_device:
+            try:
+                if _SYSTEM == "Windows":
+                    # Windows rename fails instead of replacing an existing file
+                    os.rename(src, dest)
+                    return True
                 
-            elif system == "Darwin":  # macOS
-                # Use lpr command for printing
-                cmd = ["lpr", "-P", printer_to_use, file_path]
-                subprocess.run(cmd, check=True)
-                
-            elif system == "Linux":
-                # Use lp command for printing
-                cmd = ["lp", "-d", printer_to_use, file_path]
-                subprocess.run(cmd, check=True)
-                
-            else:
-                self.logger.error(f"❌ Unsupported operating system: {system}")
+                # A hard link fails with EEXIST instead of replacing dest
+                os.link(src, dest)
+            except FileExistsError:
                 return False
-            
-            self.logger.info(f"✅ Print job sent successfully: {filename}")
-            # Wait a bit for print job to be queued
-            time.sleep(2)
-            return True
-            
-        except Exception as e:
-            self.logger.error(f"❌ PRINT FAILED: {filename} - {str(e)}")
+            except OSError:
+                # No hard link support (or a bind mount across filesystems):
+                # fall back to reserving the name below
+                pass
+            else:
+                try:
+                    os.unlink(src)
+                except OSError:
+                    # Don't leave the file in both folders
+                    os.unlink(dest)
+                    raise
+                return True
+        
+        # Reserve the name with an exclusive create, then move over the placeholder
+        try:
+            fd = os.open(dest, os.O_WRONLY | os.O_CREAT | os.O_EXCL)
+        except FileExistsError:
             return False
+        os.close(fd)
+        try:
+            if same_device:
+                try:
+                    os.replace(src, dest)
+                    return True
+                except OSError as e:
+                    if e.errno != errno.EXDEV:
+                        raise
+            # Only copy the file when it's on another filesystem
+            import shutil
+            shutil.move(src, dest)
+        except Exception:
+            os.unlink(dest)
+            raise
+        return True
     
-    def move_to_success(self, file_path: str):
-        """Move file to success folder"""
+    def _next_free_counter(self, folder: str, name: str, ext: str) -> int:
+        """Scan folder once for the highest existing name_N.ext counter"""
+        prefix = f"{name}_"
+        highest = 0
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if not (entry.name.startswith(prefix) and entry.name.endswith(ext)):
+                    continue
+                suffix = entry.name[len(prefix):len(entry.name) - len(ext)]
+                if suffix.isdigit():
+                    highest = max(highest, int(suffix))
+        return highest + 1
+    
+    def move_to_success(self, pending_file: PendingFile) -> bool:
+        """Move file to success folder, returning whether it was moved"""
         try:
-            filename = os.path.basename(file_path)
-            dest_path = os.path.join(self.config.success_folder, filename)
-            
-            # Handle duplicate filenames
-            counter = 1
-            while os.path.exists(dest_path):
-                name, ext = os.path.splitext(filename)
-                dest_path = os.path.join(
-                    self.config.success_folder, 
-                    f"{name}_{counter}{ext}"
-                )
-                counter += 1
-            
-            shutil.move(file_path, dest_path)
-            dest_filename = os.path.basename(dest_path)
-            self.logger.info(f"   ➜ Moved to Success folder: {dest_filename}")
+            dest_filename = self._move_unique(
+                pending_file, self.config.success_folder, self.config.success_prefix)
+            self.logger.info("   ➜ Moved to Success folder: %s", dest_filename)
+            return True
             
         except Exception as e:
-            self.logger.error(f"❌ Error moving file to Success: {str(e)}")
+            self.logger.error("❌ Error moving file to Success: %s", e)
+            return False
     
-    def move_to_error(self, file_path: str):
-        """Move file to error folder"""
+    def move_to_error(self, pending_file: PendingFile) -> bool:
+        """Move file to error folder, returning whether it was moved"""
         try:
-            filename = os.path.basename(file_path)
-            dest_path = os.path.join(self.config.error_folder, filename)
-            
-            # Handle duplicate filenames
-            counter = 1
-            while os.path.exists(dest_path):
-                name, ext = os.path.splitext(filename)
-                dest_path = os.path.join(
-                    self.config.error_folder, 
-                    f"{name}_{counter}{ext}"
-                )
-                counter += 1
-            
-            shutil.move(file_path, dest_path)
-            dest_filename = os.path.basename(dest_path)
-            self.logger.info(f"   ➜ Moved to Error folder: {dest_filename}")
+            dest_filename = self._move_unique(
+                pending_file, self.config.error_folder, self.config.error_prefix)
+            self.logger.info("   ➜ Moved to Error folder: %s", dest_filename)
+            return True
             
         except Exception as e:
-            self.logger.error(f"❌ Error moving file to Error folder: {str(e)}")
+            self.logger.error("❌ Error moving file to Error folder: %s", e)
+            return False
 
 
 class BatchPrintService:
     """Main service for managing hot folder printing"""
     
-    def __init__(self, config_file: str = "config.json"):
+    def __init__(self, config_file: str = "config.json", config: Optional[dict] = None):
         self.config_file = config_file
         self.hot_folders: List[HotFolderConfig] = []
         self.observers: List[Observer] = []
         self.handlers: List[PrintHandler] = []
+        # Handlers by the real path of their watch folder
+        self._handlers_by_watch: Dict[str, PrintHandler] = {}
         self.poll_interval = 5
         self.logger = logging.getLogger("BatchPrintService")
+        # Set by handlers when files arrive; poll_interval is only a fallback
+        self._wakeup = threading.Event()
         
-        self.load_config()
+        self.load_config(config)
         
-    def load_config(self):
-        """Load configuration from JSON file"""
+        # Each hot folder is processed on its own worker so a backlog in one
+        # folder doesn't hold up the others; jobs for the same printer are
+        # still sent one at a time (see _printer_lock)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, min(32, len(self.hot_folders))),
+            thread_name_prefix="PrintWorker"
+        )
+        
+    def load_config(self, config: Optional[dict] = None):
+        """Load configuration, reading the JSON file unless already parsed"""
         try:
-            self.logger.info(f"Loading configuration from: {self.config_file}")
-            
-            with open(self.config_file, 'r') as f:
-                config = json.load(f)
+            if config is None:
+                self.logger.info(f"Loading configuration from: {self.config_file}")
+                config = load_config_file(self.config_file)
             
-            self.poll_interval = config.get('poll_interval', 5)
+            # Parse the whole config before changing anything, so a bad
+            # reload leaves the running config as it was
+            poll_interval = config.get('poll_interval', 5)
             
+            hot_folders = []
             for folder_config in config.get('hot_folders', []):
                 # Get printer name, allowing it to be None/empty for default printer
                 printer_name = folder_config.get('printer_name')
                 if printer_name == "":
                     printer_name = None
                     
-                hot_folder = HotFolderConfig(
+                hot_folders.append(HotFolderConfig(
                     name=folder_config['name'],
                     watch_path=folder_config['watch_path'],
                     printer_name=printer_name,
                     success_folder=folder_config['success_folder'],
                     error_folder=folder_config['error_folder']
-                )
-                self.hot_folders.append(hot_folder)
-                
+                ))
+            
+            # Done once per load (startup and SIGHUP), never per file
+            for hot_folder in hot_folders:
+                hot_folder.create_folders()
+            
+            self.poll_interval = poll_interval
+            self.hot_folders = hot_folders
+            
             self.logger.info(f"✅ Configuration loaded: {len(self.hot_folders)} hot folder(s) configured")
             
         except Exception as e:
@@ -309,18 +968,13 @@ class BatchPrintService:
         self.logger.info("SERVICE STARTING...")
         self.logger.info("")
         
+        # SIGHUP re-reads the system default printer (not available on
+        # Windows); handlers can only be set from the main thread
+        if hasattr(signal, "SIGHUP") and threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGHUP, self._handle_sighup)
+        
         for hot_folder in self.hot_folders:
-            # Create watch folder if it doesn't exist
-            os.makedirs(hot_folder.watch_path, exist_ok=True)
-            
-            # Create handler and observer
-            handler = PrintHandler(hot_folder)
-            observer = Observer()
-            observer.schedule(handler, hot_folder.watch_path, recursive=False)
-            observer.start()
-            
-            self.handlers.append(handler)
-            self.observers.append(observer)
+            polling = self._watch_folder(hot_folder)
             
             self.logger.info(f"Watching Folder: {hot_folder.watch_path}")
             if hot_folder.printer_name:
@@ -333,19 +987,39 @@ class BatchPrintService:
                     self.logger.info(f"  → Printer: System default (none currently set)")
             self.logger.info(f"  → Success: {hot_folder.success_folder}")
             self.logger.info(f"  → Error: {hot_folder.error_folder}")
+            if polling:
+                self.logger.info("  → Network share: polling for new files")
             self.logger.info("")
         
-        self.logger.info(f"Checking for files every {self.poll_interval} seconds...")
+        self.logger.info(f"Processing files as they arrive (checking at least every {self.poll_interval} seconds)...")
         self.logger.info("Press Ctrl+C to stop the service")
         self.logger.info("-" * 70)
         
+        if len(self.handlers) == 1:
+            # A single hot folder skips the fan-out, but still runs on the
+            # executor: Ctrl+C then can't interrupt a pass between printing
+            # and moving the files, as stop() waits for it to finish
+            process_pending_files = functools.partial(
+                self._process_pending_files_for, self.handlers[0])
+        else:
+            process_pending_files = self._process_all_pending_files
+        
         try:
             while True:
-                # Process pending files for all handlers
-                for handler in self.handlers:
-                    handler.process_pending_files()
+                try:
+                    process_pending_files()
+                except Exception as e:
+                    self.logger.error("❌ Error processing files: %s", e)
+                    # Events may have been lost, so look for stranded files
+                    for handler in self.handlers:
+                        handler.initial_scan()
                 
-                time.sleep(self.poll_interval)
+                # Sleep until a file arrives; if none does within
+                # poll_interval, rescan the folders in case an event was missed
+                if not self._wakeup.wait(timeout=self.poll_interval):
+                    for handler in self.handlers:
+                        handler.initial_scan()
+                self._wakeup.clear()
                 
         except KeyboardInterrupt:
             self.logger.info("")
@@ -353,20 +1027,150 @@ class BatchPrintService:
             self.logger.info("Shutdown requested by user (Ctrl+C)")
             self.stop()
     
+    def _watch_folder(self, hot_folder: HotFolderConfig) -> bool:
+        """Start watching a hot folder, returning whether it is polled"""
+        # Create watch folder if it doesn't exist
+        os.makedirs(hot_folder.watch_path, exist_ok=True)
+        
+        # Create handler and observer
+        polling = _is_network_path(hot_folder.watch_path)
+        observer, close_events = _create_observer(polling)
+        handler = PrintHandler(hot_folder, close_events=close_events,
+                               wakeup=self._wakeup)
+        observer.schedule(handler, hot_folder.watch_path, recursive=False)
+        observer.start()
+        
+        # Pick up files copied in while the service wasn't running
+        handler.initial_scan()
+        
+        self.handlers.append(handler)
+        self._handlers_by_watch[os.path.realpath(hot_folder.watch_path)] = handler
+        self.observers.append(observer)
+        return polling
+    
+    def _process_pending_files_for(self, handler: PrintHandler):
+        """Process pending files for one handler on the executor"""
+        self._executor.submit(handler.process_pending_files).result()
+    
+    def _process_all_pending_files(self):
+        """Process pending files for all handlers in parallel"""
+        futures = [
+            self._executor.submit(handler.process_pending_files)
+            for handler in self.handlers
+        ]
+        wait(futures)
+        for future in futures:
+            future.result()
+    
+    def handler_for(self, path: str) -> Optional[PrintHandler]:
+        """Get the handler watching path, which may be a hot folder or a
+        file directly inside one (only available once started)"""
+        path = os.path.realpath(path)
+        handler = self._handlers_by_watch.get(path)
+        if handler is None:
+            handler = self._handlers_by_watch.get(os.path.dirname(path))
+        return handler
+    
+    def force_reload(self):
+        """Re-read the config file and apply it to the running hot folders
+        
+        Printer names, Success/Error folders and poll_interval take effect
+        right away; adding, removing or moving hot folders needs a restart.
+        """
+        _config_cache.pop(os.path.abspath(self.config_file), None)
+        self.load_config()
+        
+        # Match folders to running handlers by watch folder (exactly, unlike
+        # handler_for, so a new subfolder isn't taken for its parent)
+        updated = set()
+        for hot_folder in self.hot_folders:
+            handler = self._handlers_by_watch.get(os.path.realpath(hot_folder.watch_path))
+            if handler is None:
+                if self.handlers:
+                    self.logger.warning(f"Hot folder '{hot_folder.name}' was added, restart the service to start watching it")
+                continue
+            handler.config = hot_folder
+            updated.add(handler)
+        
+        for handler in self.handlers:
+            if handler not in updated:
+                self.logger.warning(f"Hot folder '{handler.config.name}' was removed or moved, restart the service to apply")
+    
+    def _handle_sighup(self, signum, frame):
+        """Reload the configuration and look up the default printer again"""
+        self.logger.info("SIGHUP received: reloading configuration")
+        get_default_printer.cache_clear()
+        try:
+            self.force_reload()
+        except Exception:
+            # load_config has logged the error; keep running with the old config
+            pass
+    
     def stop(self):
         """Stop monitoring all hot folders"""
         for observer in self.observers:
             observer.stop()
             observer.join()
         
+        self._executor.shutdown(wait=True)
+        
+        for handler in self.handlers:
+            handler.close()
+        
         self.logger.info("All monitors stopped successfully")
         self.logger.info("=" * 70)
         self.logger.info("  SERVICE STOPPED")
         self.logger.info("=" * 70)
 
 
+def load_config_file(config_file: str) -> dict:
+    """Read and parse a JSON configuration file
+    
+    The parsed config is reused while the file's modification time and
+    size are unchanged, for at most CONFIG_CACHE_TTL seconds. The returned
+    dict is shared between callers and must not be modified.
+    """
+    key = os.path.abspath(config_file)
+    stat = os.stat(config_file)
+    now = time.monotonic()
+    
+    cached = _config_cache.get(key)
+    if (cached is not None
+            and cached[:2] == (stat.st_mtime_ns, stat.st_size)
+            and now - cached[2] < CONFIG_CACHE_TTL):
+        return cached[3]
+    
+    with open(config_file, 'rb') as f:
+        if (msgspec is not None or orjson is not None) and stat.st_size > CONFIG_MMAP_THRESHOLD:
+            # Let the parser read the mapped file instead of copying it into
+            # a bytes object first (json.loads can't take a memoryview)
+            import mmap
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                with memoryview(mm) as view:
+                    config = _parse_config(view)
+        else:
+            config = _parse_config(f.read())
+    
+    _config_cache[key] = (stat.st_mtime_ns, stat.st_size, now, config)
+    return config
+
+
+def _parse_config(data) -> dict:
+    """Parse config JSON with the fastest parser installed"""
+    if msgspec is not None:
+        # Only the fields in _ConfigSchema are decoded; the rest are skipped
+        return msgspec.to_builtins(_config_decoder.decode(data))
+    if orjson is not None:
+        return orjson.loads(data)
+    import json
+    return json.loads(data)
+
+
 def setup_logging(log_level: str = "INFO"):
     """Configure logging for the application with human-readable format"""
+    # Only the service needs the file handler, not modules importing batch_print
+    import logging.handlers
+    
     # Create a custom formatter for more readable logs
     file_formatter = logging.Formatter(
         '%(asctime)s | %(levelname)-8s | %(message)s',
@@ -377,8 +1181,12 @@ def setup_logging(log_level: str = "INFO"):
         datefmt='%H:%M:%S'
     )
     
-    # File handler
-    file_handler = logging.FileHandler('batch_print.log')
+    # File handler, rotated so the log doesn't grow without bound
+    file_handler = logging.handlers.RotatingFileHandler(
+        'batch_print.log',
+        maxBytes=10 * 1024 * 1024,
+        backupCount=5
+    )
     file_handler.setFormatter(file_formatter)
     
     # Console handler
@@ -394,12 +1202,13 @@ def setup_logging(log_level: str = "INFO"):
 
 def main():
     """Main entry point"""
-    # Load log level from config
+    # Read the config once for both the log level and the service
     try:
-        with open('config.json', 'r') as f:
-            config = json.load(f)
-            log_level = config.get('log_level', 'INFO')
-    except:
+        config = load_config_file('config.json')
+        log_level = config.get('log_level', 'INFO')
+    except Exception:
+        # Let the service report the problem once logging is set up
+        config = None
         log_level = 'INFO'
     
     setup_logging(log_level)
@@ -408,13 +1217,13 @@ def main():
     logger.info("=" * 70)
     logger.info("  BATCH PRINT HOT FOLDER SERVICE")
     logger.info("=" * 70)
-    logger.info(f"Platform: {platform.system()}")
+    logger.info(f"Platform: {_SYSTEM}")
     logger.info(f"Python Version: {sys.version.split()[0]}")
     logger.info(f"Log Level: {log_level}")
     logger.info("=" * 70)
     
     try:
-        service = BatchPrintService()
+        service = BatchPrintService(config=config)
         service.start()
     except Exception as e:
         logger.error(f"FATAL ERROR: {str(e)}", exc_info=True)
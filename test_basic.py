@@ -4,10 +4,11 @@ Simple test script to verify batch_print.py functionality
 """
 import json
 import os
+import shutil
 import sys
 import tempfile
 import time
-from pathlib import Path
+from operator import itemgetter
 
 # Test that we can import the module
 try:
@@ -17,6 +18,9 @@ except ImportError as e:
     print(f"✗ Failed to import batch_print: {e}")
     sys.exit(1)
 
+# One scratch directory for all test files, removed at the end
+scratch_dir = tempfile.mkdtemp(prefix="batch_print_basic_")
+
 # Test configuration loading
 print("\nTesting configuration handling...")
 try:
@@ -32,12 +36,14 @@ try:
             }
         ],
         "poll_interval": 1,
-        "log_level": "DEBUG"
+        "log_level": "DEBUG",
+        # Keys the service doesn't use are ignored
+        "printer_metadata": {"TestPrinter": {"duplex": True, "trays": [1, 2]}}
     }
     
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
+    test_config_path = os.path.join(scratch_dir, "config.json")
+    with open(test_config_path, 'w') as f:
         json.dump(test_config, f)
-        test_config_path = f.name
     
     # Test HotFolderConfig creation
     config = batch_print.HotFolderConfig(
@@ -49,14 +55,67 @@ try:
     )
     print("✓ HotFolderConfig created successfully")
     
+    # Configs are slotted (no per-instance __dict__) and hashable
+    if not hasattr(config, "__dict__") and hash(config) == hash(batch_print.HotFolderConfig(
+            "TestFolder", "/tmp/test_hot_folder", "TestPrinter",
+            "/tmp/test_hot_folder/Success", "/tmp/test_hot_folder/Error")):
+        print("✓ HotFolderConfig is slotted and hashable")
+    else:
+        print("✗ HotFolderConfig has a __dict__ or is not hashable by value")
+    
+    # Folders are only created when asked, not on every construction
+    lazy_root = os.path.join(scratch_dir, "lazy")
+    lazy_config = batch_print.HotFolderConfig(
+        "Lazy", lazy_root, None,
+        os.path.join(lazy_root, "Success"), os.path.join(lazy_root, "Error"))
+    if os.path.exists(lazy_root):
+        print("✗ HotFolderConfig created folders on construction")
+    lazy_config.create_folders()
+    if os.path.isdir(lazy_config.success_folder) and os.path.isdir(lazy_config.error_folder):
+        print("✓ Success and Error folders created by create_folders()")
+    else:
+        print("✗ create_folders() did not create the folders")
+    
     # Test BatchPrintService loading
     service = batch_print.BatchPrintService(test_config_path)
     print("✓ BatchPrintService loaded configuration successfully")
     print(f"  - Loaded {len(service.hot_folders)} hot folder(s)")
     print(f"  - Poll interval: {service.poll_interval}s")
     
-    # Clean up
-    os.unlink(test_config_path)
+    # Unchanged config files are parsed only once
+    if batch_print.load_config_file(test_config_path) is batch_print.load_config_file(test_config_path):
+        print("✓ Unchanged configuration reused from cache")
+    else:
+        print("✗ Unchanged configuration was parsed again")
+    
+    test_config["poll_interval"] = 2
+    with open(test_config_path, 'w') as f:
+        json.dump(test_config, f, indent=2)
+    if batch_print.load_config_file(test_config_path)["poll_interval"] == 2:
+        print("✓ Changed configuration re-read")
+    else:
+        print("✗ Changed configuration not re-read")
+    
+    # A reload with an invalid entry keeps the running configuration
+    old_folders = list(service.hot_folders)
+    old_interval = service.poll_interval
+    bad_folder = os.path.join(scratch_dir, "bad_reload")
+    bad_config = dict(test_config, poll_interval=30, hot_folders=[
+        dict(test_config["hot_folders"][0], success_folder=os.path.join(bad_folder, "Success")),
+        {"name": "Broken", "watch_path": bad_folder, "error_folder": bad_folder},
+    ])
+    with open(test_config_path, 'w') as f:
+        json.dump(bad_config, f)
+    try:
+        service.force_reload()
+        print("✗ Invalid configuration reloaded without an error")
+    except Exception:
+        pass
+    if (service.hot_folders == old_folders and service.poll_interval == old_interval
+            and not os.path.exists(bad_folder)):
+        print("✓ Invalid reload left the configuration unchanged")
+    else:
+        print("✗ Invalid reload changed the running configuration")
     
 except Exception as e:
     print(f"✗ Configuration test failed: {e}")
@@ -70,16 +129,13 @@ try:
     handler = batch_print.PrintHandler(config)
     
     # Create a test file
-    with tempfile.NamedTemporaryFile(mode='w', delete=False) as f:
+    test_file_path = os.path.join(scratch_dir, "ready.txt")
+    with open(test_file_path, 'w') as f:
         f.write("Test content")
-        test_file_path = f.name
     
-    is_ready = handler._is_file_ready(test_file_path, max_attempts=1)
+    is_ready = handler._is_file_ready(test_file_path)
     print(f"✓ File readiness check completed: {is_ready}")
     
-    # Clean up
-    os.unlink(test_file_path)
-    
 except Exception as e:
     print(f"✗ File readiness test failed: {e}")
     import traceback
@@ -88,25 +144,38 @@ except Exception as e:
 # Test alphabetical sorting logic
 print("\nTesting alphabetical sorting...")
 try:
-    test_files = [
-        "/tmp/zebra.txt",
-        "/tmp/apple.txt",
-        "/tmp/banana.txt",
-        "/tmp/123.txt"
-    ]
+    sort_dir = os.path.join(scratch_dir, "sort")
+    os.mkdir(sort_dir)
+    for name in ["zebra.txt", "apple.txt", "banana.txt", "123.txt"]:
+        with open(os.path.join(sort_dir, name), 'w') as f:
+            f.write(name)
     
-    sorted_files = sorted(test_files, key=lambda x: os.path.basename(x))
-    expected = ["/tmp/123.txt", "/tmp/apple.txt", "/tmp/banana.txt", "/tmp/zebra.txt"]
+    # Split names from paths once while scanning, then sort on the name
+    with os.scandir(sort_dir) as entries:
+        test_files = [(entry.name, entry.path) for entry in entries]
+    test_files.sort(key=itemgetter(0))
+    sorted_names = tuple(name for name, _ in test_files)
+    expected = ("123.txt", "apple.txt", "banana.txt", "zebra.txt")
     
-    if sorted_files == expected:
+    if sorted_names == expected:
         print("✓ Alphabetical sorting works correctly")
-        print(f"  Sorted order: {[os.path.basename(f) for f in sorted_files]}")
+        print(f"  Sorted order: {sorted_names}")
     else:
-        print(f"✗ Sorting failed. Expected {expected}, got {sorted_files}")
+        print(f"✗ Sorting failed. Expected {expected}, got {sorted_names}")
         
 except Exception as e:
     print(f"✗ Sorting test failed: {e}")
 
+# Test per-printer print locks
+print("\nTesting per-printer print locks...")
+if (batch_print._printer_lock("PrinterA") is batch_print._printer_lock("PrinterA")
+        and batch_print._printer_lock("PrinterA") is not batch_print._printer_lock("PrinterB")):
+    print("✓ Each printer has its own shared lock")
+else:
+    print("✗ Printer locks are not shared per printer")
+
+shutil.rmtree(scratch_dir, ignore_errors=True)
+
 print("\n" + "="*60)
 print("Basic tests completed successfully!")
 print("="*60)
@@ -4,9 +4,9 @@ Test script to verify default printer functionality
 """
 import json
 import os
+import shutil
 import sys
 import tempfile
-from pathlib import Path
 
 # Test that we can import the module
 try:
@@ -16,6 +16,9 @@ except ImportError as e:
     print(f"✗ Failed to import batch_print: {e}")
     sys.exit(1)
 
+# One scratch directory for all test files, removed at the end
+scratch_dir = tempfile.mkdtemp(prefix="batch_print_default_")
+
 # Test get_default_printer function
 print("\nTesting get_default_printer()...")
 try:
@@ -29,6 +32,28 @@ except Exception as e:
     import traceback
     traceback.print_exc()
 
+# On CUPS systems LPDEST is read directly, and the result is cached
+if batch_print._SYSTEM in ("Linux", "Darwin"):
+    saved_lpdest = os.environ.get("LPDEST")
+    os.environ["LPDEST"] = "EnvPrinter"
+    batch_print.get_default_printer.cache_clear()
+    if batch_print.get_default_printer() == "EnvPrinter":
+        print("✓ Default printer read from LPDEST")
+    else:
+        print(f"✗ LPDEST ignored, got: {batch_print.get_default_printer()}")
+    
+    os.environ["LPDEST"] = "OtherPrinter"
+    if batch_print.get_default_printer() == "EnvPrinter":
+        print("✓ Default printer cached between lookups")
+    else:
+        print("✗ Default printer looked up again before the cache expired")
+    
+    if saved_lpdest is None:
+        del os.environ["LPDEST"]
+    else:
+        os.environ["LPDEST"] = saved_lpdest
+    batch_print.get_default_printer.cache_clear()
+
 # Test configuration with empty printer_name
 print("\nTesting configuration with empty printer_name...")
 try:
@@ -47,9 +72,9 @@ try:
         "log_level": "DEBUG"
     }
     
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
+    test_config_path = os.path.join(scratch_dir, "empty_printer.json")
+    with open(test_config_path, 'w') as f:
         json.dump(test_config, f)
-        test_config_path = f.name
     
     # Test BatchPrintService loading
     service = batch_print.BatchPrintService(test_config_path)
@@ -62,9 +87,6 @@ try:
     else:
         print(f"✗ Expected None, got: {service.hot_folders[0].printer_name}")
     
-    # Clean up
-    os.unlink(test_config_path)
-    
 except Exception as e:
     print(f"✗ Configuration test failed: {e}")
     import traceback
@@ -88,9 +110,9 @@ try:
         "log_level": "DEBUG"
     }
     
-    with tempfile.NamedTemporaryFile(mode='w', suffix='.json', delete=False) as f:
+    test_config_path = os.path.join(scratch_dir, "missing_printer.json")
+    with open(test_config_path, 'w') as f:
         json.dump(test_config, f)
-        test_config_path = f.name
     
     # Test BatchPrintService loading
     service = batch_print.BatchPrintService(test_config_path)
@@ -102,9 +124,6 @@ try:
     else:
         print(f"✗ Expected None, got: {service.hot_folders[0].printer_name}")
     
-    # Clean up
-    os.unlink(test_config_path)
-    
 except Exception as e:
     print(f"✗ Configuration test failed: {e}")
     import traceback
@@ -134,6 +153,8 @@ except Exception as e:
     traceback.print_exc()
     sys.exit(1)
 
+shutil.rmtree(scratch_dir, ignore_errors=True)
+
 print("\n" + "="*60)
 print("Default printer tests completed successfully!")
 print("="*60)
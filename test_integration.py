@@ -9,7 +9,6 @@ import sys
 import time
 import tempfile
 import shutil
-from pathlib import Path
 
 print("="*70)
 print("Batch Print Hot Folder - Integration Test")
@@ -99,11 +98,11 @@ for filename in test_files:
         f.write(f"Test content for {filename}")
 
 # Get the files and sort them
-files = os.listdir(test_folders[0]["watch_path"])
-files = [f for f in files if os.path.isfile(os.path.join(test_folders[0]["watch_path"], f))]
-sorted_files = sorted(files)
+with os.scandir(test_folders[0]["watch_path"]) as entries:
+    files = [entry.name for entry in entries if entry.is_file()]
+sorted_files = tuple(sorted(files))
 
-expected_order = ["123.txt", "apple.txt", "banana.txt", "zebra.txt"]
+expected_order = ("123.txt", "apple.txt", "banana.txt", "zebra.txt")
 if sorted_files == expected_order:
     print(f"✓ Files sorted correctly: {sorted_files}")
 else:
@@ -119,7 +118,7 @@ handler = batch_print.PrintHandler(service.hot_folders[0])
 
 # Test moving to success
 test_file = os.path.join(test_folders[0]["watch_path"], "apple.txt")
-handler.move_to_success(test_file)
+handler.move_to_success(batch_print.PendingFile.from_path(test_file))
 
 if os.path.exists(os.path.join(test_folders[0]["success_folder"], "apple.txt")):
     print("✓ File successfully moved to Success folder")
@@ -128,7 +127,7 @@ else:
 
 # Test moving to error
 test_file = os.path.join(test_folders[0]["watch_path"], "banana.txt")
-handler.move_to_error(test_file)
+handler.move_to_error(batch_print.PendingFile.from_path(test_file))
 
 if os.path.exists(os.path.join(test_folders[0]["error_folder"], "banana.txt")):
     print("✓ File successfully moved to Error folder")
@@ -142,12 +141,12 @@ print("="*70)
 
 # Create a duplicate file
 dup_file = os.path.join(test_folders[0]["watch_path"], "zebra.txt")
-handler.move_to_success(dup_file)
+handler.move_to_success(batch_print.PendingFile.from_path(dup_file))
 
 # Create another duplicate
 with open(dup_file, 'w') as f:
     f.write("Another zebra")
-handler.move_to_success(dup_file)
+handler.move_to_success(batch_print.PendingFile.from_path(dup_file))
 
 success_files = os.listdir(test_folders[0]["success_folder"])
 zebra_files = [f for f in success_files if f.startswith("zebra")]
@@ -157,6 +156,57 @@ if len(zebra_files) >= 2:
 else:
     print(f"✗ Duplicate handling failed: {zebra_files}")
 
+# A third duplicate continues from the last counter used
+with open(dup_file, 'w') as f:
+    f.write("Third zebra")
+handler.move_to_success(batch_print.PendingFile.from_path(dup_file))
+
+if os.path.exists(os.path.join(test_folders[0]["success_folder"], "zebra_2.txt")):
+    print("✓ Repeated duplicates get increasing counters")
+else:
+    print(f"✗ Repeated duplicate handling failed: {os.listdir(test_folders[0]['success_folder'])}")
+
+# The copy path used across filesystems also refuses to overwrite
+with open(dup_file, 'w') as f:
+    f.write("Copied zebra")
+copied = handler._move_no_replace(
+    dup_file, os.path.join(test_folders[0]["success_folder"], "zebra.txt"), same_device=False)
+if not copied and os.path.exists(dup_file):
+    print("✓ Cross-filesystem move does not overwrite existing files")
+else:
+    print("✗ Cross-filesystem move overwrote an existing file")
+if handler._move_no_replace(
+        dup_file, os.path.join(test_folders[0]["success_folder"], "zebra_copy.txt"),
+        same_device=False) and not os.path.exists(dup_file):
+    print("✓ Cross-filesystem move to a free name works")
+else:
+    print("✗ Cross-filesystem move to a free name failed")
+
+# If the source can't be removed after linking (e.g. a sticky-bit drop
+# folder), the new link is removed again so the file isn't in both places
+if batch_print._SYSTEM != "Windows":
+    with open(dup_file, 'w') as f:
+        f.write("Undeletable zebra")
+    linked_dest = os.path.join(test_folders[0]["success_folder"], "zebra_linked.txt")
+    real_unlink = os.unlink
+    def refuse_unlink(path, *args, **kwargs):
+        if path == dup_file:
+            raise PermissionError(1, "Operation not permitted", path)
+        return real_unlink(path, *args, **kwargs)
+    os.unlink = refuse_unlink
+    try:
+        handler._move_no_replace(dup_file, linked_dest)
+        print("✗ Move reported success although the source couldn't be removed")
+    except PermissionError:
+        pass
+    finally:
+        os.unlink = real_unlink
+    if os.path.exists(dup_file) and not os.path.exists(linked_dest):
+        print("✓ Failed move leaves the file only in the hot folder")
+    else:
+        print("✗ Failed move left the file in both folders")
+    os.remove(dup_file)
+
 # Test 6: File readiness check
 print("\n" + "="*70)
 print("TEST 6: File Readiness Detection")
@@ -166,9 +216,201 @@ ready_file = os.path.join(test_folders[0]["watch_path"], "ready_test.txt")
 with open(ready_file, 'w') as f:
     f.write("Test content")
 
-is_ready = handler._is_file_ready(ready_file, max_attempts=2)
+is_ready = handler._is_file_ready(ready_file)
 print(f"✓ File readiness check: {is_ready}")
 
+# The size from a directory scan entry gives the same answer
+with os.scandir(test_folders[0]["watch_path"]) as entries:
+    ready_entry = next(entry for entry in entries if entry.name == "ready_test.txt")
+if handler._is_file_ready(ready_file, ready_entry) == is_ready:
+    print("✓ Readiness check from scan entry matches")
+else:
+    print("✗ Readiness check from scan entry differs")
+
+# A file still locked by its writer is not ready (POSIX advisory locks)
+if batch_print.fcntl is not None:
+    with open(ready_file, 'a') as writer:
+        batch_print.fcntl.flock(writer, batch_print.fcntl.LOCK_EX)
+        locked_ready = handler._is_file_ready(ready_file)
+    if not locked_ready and handler._is_file_ready(ready_file):
+        print("✓ Locked file waits until the writer releases it")
+    else:
+        print(f"✗ Lock probe wrong: ready while locked={locked_ready}")
+
+# With close events, files are only queued once the writer closes them
+from watchdog.events import FileCreatedEvent, FileClosedEvent
+close_handler = batch_print.PrintHandler(service.hot_folders[0], close_events=True)
+close_handler.on_created(FileCreatedEvent(ready_file))
+if not close_handler.pending_files.empty():
+    print("✗ File queued before it was closed")
+close_handler.on_closed(FileClosedEvent(ready_file))
+if close_handler.pending_files.get_nowait().path == ready_file:
+    print("✓ File queued on close event")
+else:
+    print("✗ File not queued on close event")
+
+# Only files inside the Success/Error folders are ignored, not lookalike names
+lookalike_file = os.path.join(test_folders[0]["watch_path"], "Success_report.txt")
+close_handler.on_closed(FileClosedEvent(lookalike_file))
+if close_handler.pending_files.empty():
+    print("✗ File with a name starting with 'Success' was ignored")
+else:
+    close_handler.pending_files.get_nowait()
+    print("✓ Lookalike filename queued")
+
+close_handler.on_closed(FileClosedEvent(os.path.join(test_folders[0]["success_folder"], "done.txt")))
+if close_handler.pending_files.empty():
+    print("✓ File in Success folder ignored")
+else:
+    print("✗ File in Success folder was queued")
+
+# Files deleted before they are printed are forgotten, not kept pending
+gone_file = os.path.join(test_folders[0]["watch_path"], "gone.txt")
+with open(gone_file, 'w') as f:
+    f.write("Deleted before printing")
+close_handler.on_closed(FileClosedEvent(gone_file))
+os.remove(gone_file)
+close_handler.process_pending_files()
+if close_handler._seen:
+    print(f"✗ Deleted file still pending: {list(close_handler._seen)}")
+else:
+    print("✓ Deleted file dropped from pending files")
+
+# Files found by a scan had no close event, so they are still checked first
+close_handler.initial_scan()
+close_handler.process_pending_files()
+if os.path.exists(ready_file) and close_handler._seen:
+    print("✓ Scanned file not printed before its readiness check")
+else:
+    print("✗ Scanned file printed without a readiness check")
+
+# An empty file closed by its writer waits until it has content
+empty_handler = batch_print.PrintHandler(service.hot_folders[1], close_events=True)
+printed = []
+empty_handler.print_files = lambda files: {f: printed.append(f.name) is None for f in files}
+empty_file = os.path.join(test_folders[1]["watch_path"], "empty.pdf")
+open(empty_file, 'w').close()
+empty_handler.on_closed(FileClosedEvent(empty_file))
+empty_handler.process_pending_files()
+empty_printed = list(printed)
+with open(empty_file, 'w') as f:
+    f.write("Filled in later")
+empty_handler.on_closed(FileClosedEvent(empty_file))
+empty_handler.process_pending_files()
+if not empty_printed and printed == ["empty.pdf"]:
+    print("✓ Empty closed file printed only once it has content")
+else:
+    print(f"✗ Empty closed file handling wrong: printed while empty={empty_printed}")
+
+# Without close events, a file is only printed once it stops changing
+stable_handler = batch_print.PrintHandler(service.hot_folders[1])
+copy_file = os.path.join(test_folders[1]["watch_path"], "copying.txt")
+with open(copy_file, 'w') as writer:
+    writer.write("First part")
+    writer.flush()
+    stable_handler.on_created(FileCreatedEvent(copy_file))
+    stable_handler.process_pending_files()
+    writer.write(" and the rest")
+    writer.flush()
+    stable_handler.process_pending_files()
+    still_pending = os.path.exists(copy_file) and len(stable_handler._seen) == 1
+stable_handler.process_pending_files()
+if still_pending and not os.path.exists(copy_file):
+    print("✓ File still being written waits until it stops changing")
+else:
+    print(f"✗ Stability check wrong: pending while written={still_pending}")
+
+# Files dropped when too many are pending are found again by a rescan
+max_pending = batch_print.MAX_PENDING_FILES
+batch_print.MAX_PENDING_FILES = 2
+overflow_handler = batch_print.PrintHandler(service.hot_folders[1], close_events=True)
+for name in ("overflow1.txt", "overflow2.txt", "overflow3.txt"):
+    overflow_file = os.path.join(test_folders[1]["watch_path"], name)
+    with open(overflow_file, 'w') as f:
+        f.write(name)
+    overflow_handler.on_closed(FileClosedEvent(overflow_file))
+for _ in range(3):
+    overflow_handler.process_pending_files()
+batch_print.MAX_PENDING_FILES = max_pending
+stranded = [name for name in os.listdir(test_folders[1]["watch_path"]) if name.startswith("overflow")]
+if stranded:
+    print(f"✗ Files dropped at the pending limit were stranded: {stranded}")
+else:
+    print("✓ Files dropped at the pending limit picked up by a rescan")
+
+# A printed file that can't be moved out is not printed again by rescans
+stuck_root = os.path.join(test_root, "StuckFolder")
+os.makedirs(stuck_root)
+stuck_config = batch_print.HotFolderConfig(
+    "Stuck", stuck_root, "Test-Printer-1",
+    os.path.join(stuck_root, "Missing", "Success"), os.path.join(stuck_root, "Missing", "Error"))
+stuck_handler = batch_print.PrintHandler(stuck_config, close_events=True)
+printed = []
+stuck_handler.print_files = lambda files: {f: printed.append(f.name) is None for f in files}
+stuck_file = os.path.join(stuck_root, "doc.pdf")
+with open(stuck_file, 'w') as f:
+    f.write("Can't be moved")
+stuck_handler.on_closed(FileClosedEvent(stuck_file))
+for _ in range(3):
+    stuck_handler.process_pending_files()
+    stuck_handler.initial_scan()
+    stuck_handler.process_pending_files()
+if printed == ["doc.pdf"] and os.path.exists(stuck_file):
+    print("✓ File that can't be moved printed exactly once")
+else:
+    print(f"✗ File that can't be moved printed {len(printed)} time(s)")
+
+os.remove(stuck_file)
+stuck_handler.initial_scan()
+if not stuck_handler._unmovable:
+    print("✓ Unmovable file forgotten once it leaves the hot folder")
+else:
+    print("✗ Unmovable file still remembered after it was removed")
+
+# Files already in the hot folder are found by the startup scan
+scan_handler = batch_print.PrintHandler(service.hot_folders[0])
+scan_handler.initial_scan()
+scanned = set()
+while not scan_handler.pending_files.empty():
+    scanned.add(scan_handler.pending_files.get_nowait().name)
+if scanned == {"123.txt", "ready_test.txt"}:
+    print(f"✓ Startup scan found existing files: {sorted(scanned)}")
+else:
+    print(f"✗ Startup scan found {sorted(scanned)}")
+
+# Test 7: Running service lookup and reload
+print("\n" + "="*70)
+print("TEST 7: Running Hot Folder Lookup and Reload")
+print("="*70)
+
+for hot_folder in service.hot_folders:
+    service._watch_folder(hot_folder)
+
+first_watch = test_folders[0]["watch_path"]
+if (service.handler_for(first_watch) is service.handlers[0]
+        and service.handler_for(os.path.join(first_watch, "new.pdf")) is service.handlers[0]
+        and service.handler_for(test_folders[1]["watch_path"]) is service.handlers[1]):
+    print("✓ Handlers found by hot folder and by file path")
+else:
+    print("✗ Handler lookup by path failed")
+
+if service.handler_for(test_root) is None:
+    print("✓ No handler for a folder that isn't watched")
+else:
+    print("✗ Handler returned for a folder that isn't watched")
+
+# A reload applies new settings to the running handler for the same folder
+test_folders[0]["printer_name"] = "Reloaded-Printer"
+with open(config_path, 'w') as f:
+    json.dump(test_config, f, indent=2)
+service.force_reload()
+if service.handler_for(first_watch).config.printer_name == "Reloaded-Printer":
+    print("✓ Reloaded settings applied to the running handler")
+else:
+    print("✗ Reloaded settings not applied to the running handler")
+
+service.stop()
+
 # Clean up
 print("\n" + "="*70)
 print("Cleanup")